@@ -1,182 +1,606 @@
+from multiprocessing import Pool
+
 import numpy as np
-import scipy.optimize as optimize
+
+try:
+    from numba import njit
+    from numba.core.dispatcher import Dispatcher
+except ImportError:  # numba is optional, the kernels then run as plain Python
+    Dispatcher = None
+
+    def njit(func=None, **kwargs):
+        def wrap(f):
+            f.py_func = f
+            return f
+        return wrap(func) if func is not None else wrap
+
+
+def _run_kernel(kernel, f, *args):
+    """
+    Run the compiled kernel when f is jitted, otherwise fall back to its Python version.
+    The kernels copy f's result before calling f again, so f may return a reused scratch array.
+    """
+    if Dispatcher is not None and isinstance(f, Dispatcher):
+        return kernel(f, *args)
+    return kernel.py_func(f, *args)
+
+
+def _time_grid(t0, tf, h):
+    """
+    Uniform grid t0 + i*h within [t0, tf]. A step count within floating-point noise of an
+    integer is snapped to it, so e.g. 0.3/0.1 = 2.9999999999999996 still yields 4 points, and
+    is truncated otherwise, so the grid stops short of tf when h does not divide the span.
+    The last point can only exceed tf by a rounding error.
+    """
+    steps = (tf - t0) / h
+    nearest = round(steps)
+    if abs(steps - nearest) <= 1e-9 * max(1.0, abs(steps)):
+        num_steps = int(nearest) + 1
+    else:
+        num_steps = int(np.floor(steps)) + 1
+    return num_steps, t0 + np.arange(num_steps) * h
+
+
+# Adams-Bashforth weights, newest derivative first
+_AB2_COEFS = np.array([3 / 2, -1 / 2])
+_AB4_COEFS = np.array([55 / 24, -59 / 24, 37 / 24, -9 / 24])
+
+# Fixed-point sweeps of the AM2 corrector, each one costs a single RHS evaluation
+_AM2_CORRECTOR_ITERATIONS = 3
+
+# Single-stage DIRK: diagonal coefficient and the Newton settings for its stage equation
+_DIRK_GAMMA = (3 - np.sqrt(3)) / 6
+_DIRK_NEWTON_ITERATIONS = 3
+_DIRK_NEWTON_TOL = 1e-10
+_FD_STEP = np.sqrt(np.finfo(np.float64).eps)
+
+# Dormand-Prince 5(4) tableau, the last stage is evaluated at the new state and reused (FSAL)
+_DP45_C = np.array([0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0])
+_DP45_A = np.array([
+    [0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [1 / 5, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [3 / 40, 9 / 40, 0.0, 0.0, 0.0, 0.0],
+    [44 / 45, -56 / 15, 32 / 9, 0.0, 0.0, 0.0],
+    [19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729, 0.0, 0.0],
+    [9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656, 0.0],
+    [35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84],
+])
+# Difference between the 5th and the embedded 4th order weights
+_DP45_E = np.array([71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+# Dense output: y(t + theta*h) = y + h * sum_s stages[s] * (P[s] @ [theta, theta^2, theta^3, theta^4]),
+# the 4th order continuous extension of Dormand and Prince (as in SciPy's RK45)
+_DP45_P = np.array([
+    [1.0, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0.0, 0.0, 0.0, 0.0],
+    [0.0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0.0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0.0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0.0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0.0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+_DP45_SAFETY = 0.9
+_DP45_MIN_FACTOR = 0.2
+_DP45_MAX_FACTOR = 5.0
+
+# Candidate block lengths h, 2h, ..., N*h probed per point by adams_bashforth_4_adaptive
+_ASPA_CANDIDATES = 4
+# Step controller of adams_bashforth_4_adaptive: safety factor and bounds on the change of h
+_ASPA_SAFETY = 0.9
+_ASPA_MIN_FACTOR = 0.2
+_ASPA_MAX_FACTOR = 5.0
+
+
+@njit
+def _runge_kutta_4_kernel(f, x0, t0, h, num_steps, args):
+    states = np.zeros((num_steps, x0.shape[0]))
+    states[0] = x0
+    x = x0.copy()
+    # Stage slopes are copied into fixed rows, so f may hand back a reused buffer
+    k = np.empty((4, x0.shape[0]))
+
+    for i in range(1, num_steps):
+        t = t0 + (i - 1) * h
+        k[0] = f(x, t, *args)
+        k[1] = f(x + 0.5 * h * k[0], t + 0.5 * h, *args)
+        k[2] = f(x + 0.5 * h * k[1], t + 0.5 * h, *args)
+        k[3] = f(x + h * k[2], t + h, *args)
+        x = x + h * (k[0] + 2 * k[1] + 2 * k[2] + k[3]) / 6
+        states[i] = x
+
+    return states
+
+
+@njit
+def _adams_bashforth_2_kernel(f, initial_states, t0, h, num_steps, args):
+    n = initial_states.shape[1]
+    m = min(initial_states.shape[0], num_steps)
+    # One contiguous row per state variable, handed back transposed as (num_steps, n)
+    solution = np.zeros((n, num_steps))
+    solution[:, :m] = initial_states[:m].T
+    x = initial_states[m - 1].copy()
+
+    # Ring buffer of past derivatives, slot j % 2 holds f at step j, so each step costs one RHS call
+    k_hist = np.empty((2, n))
+
+    if m >= 2:
+        k_hist[(m - 2) % 2] = f(initial_states[m - 2], t0 + (m - 2) * h, *args)
+    elif num_steps > 1:
+        # First step using Euler method to for the second k, after that it will take off on its own
+        k_hist[0] = f(x, t0, *args)
+        for j in range(n):
+            x[j] += h * k_hist[0, j]
+        solution[:, 1] = x
+        m = 2
+
+    for i in range(m, num_steps):
+        k_hist[(i - 1) % 2] = f(x, t0 + (i - 1) * h, *args)
+        for j in range(n):
+            x[j] += h * (_AB2_COEFS[0] * k_hist[(i - 1) % 2, j] +
+                         _AB2_COEFS[1] * k_hist[(i - 2) % 2, j])
+        solution[:, i] = x
+
+    return solution.T
+
+
+@njit
+def _adams_bashforth_4_kernel(f, initial_states, t0, h, num_steps, args):
+    n = initial_states.shape[1]
+    m = min(initial_states.shape[0], num_steps)
+    # One contiguous row per state variable, handed back transposed as (num_steps, n)
+    solution = np.zeros((n, num_steps))
+    solution[:, :m] = initial_states[:m].T
+    x = initial_states[m - 1].copy()
+
+    # Ring buffer of past derivatives, slot j % 4 holds f at step j, so each step costs one RHS call
+    k_hist = np.empty((4, n))
+
+    # Derivatives at the start-up states (see _with_rk4_startup), the newest one is
+    # evaluated by the stepping loop below
+    for j in range(max(0, m - 4), m - 1):
+        k_hist[j % 4] = f(initial_states[j], t0 + j * h, *args)
+
+    for i in range(m, num_steps):
+        k_hist[(i - 1) % 4] = f(x, t0 + (i - 1) * h, *args)
+        for j in range(n):
+            x[j] += h * (
+                    _AB4_COEFS[0] * k_hist[(i - 1) % 4, j] +
+                    _AB4_COEFS[1] * k_hist[(i - 2) % 4, j] +
+                    _AB4_COEFS[2] * k_hist[(i - 3) % 4, j] +
+                    _AB4_COEFS[3] * k_hist[(i - 4) % 4, j]
+            )
+        solution[:, i] = x
+
+    return solution.T
+
+
+@njit
+def _adams_moulton_2_kernel(f, initial_states, t0, h, num_steps, args):
+    n = initial_states.shape[1]
+    m = min(initial_states.shape[0], num_steps)
+    # One contiguous row per state variable, handed back transposed as (num_steps, n)
+    solution = np.zeros((n, num_steps))
+    solution[:, :m] = initial_states[:m].T
+    x = initial_states[m - 1].copy()
+
+    # Ring buffer of past derivatives, slot j % 2 holds f at step j
+    k_hist = np.empty((2, n))
+
+    if m >= 2:
+        k_hist[(m - 2) % 2] = f(initial_states[m - 2], t0 + (m - 2) * h, *args)
+    elif num_steps > 1:
+        k_hist[0] = f(x, t0, *args)
+        x = x + h * k_hist[0]
+        solution[:, 1] = x
+        m = 2
+
+    for i in range(m, num_steps):
+        t = t0 + i * h
+        k_hist[(i - 1) % 2] = f(x, t0 + (i - 1) * h, *args)
+        k1 = k_hist[(i - 1) % 2]
+        k0 = k_hist[(i - 2) % 2]
+
+        # Predictor (Adams-Bashforth), then functional iteration on the trapezoidal corrector
+        x_next = x + h * (_AB2_COEFS[0] * k1 + _AB2_COEFS[1] * k0)
+        for _ in range(_AM2_CORRECTOR_ITERATIONS):
+            x_next = x + 0.5 * h * (f(x_next, t, *args) + k1)
+        x = x_next
+        solution[:, i] = x
+
+    return solution.T
+
+
+@njit
+def _custom_dirk_kernel(f, x0, t0, h, num_steps, args):
+    n = x0.shape[0]
+    # One contiguous row per state variable, handed back transposed as (num_steps, n)
+    solution = np.zeros((n, num_steps))
+    solution[:, 0] = x0
+    x_prev = x0.copy()
+
+    gamma = _DIRK_GAMMA
+    identity = np.eye(n)
+    jacobian = np.empty((n, n))
+    k1 = np.empty(n)
+    f_stage = np.empty(n)
+
+    for i in range(1, num_steps):
+        t_prev = t0 + (i - 1) * h
+        t_stage = t_prev + h * gamma
+
+        # Stage equation k1 = f(x_prev + h*gamma*k1), started from the explicit slope
+        k1[:] = f(x_prev, t_prev, *args)
+        stage_arg = x_prev + h * gamma * k1
+        f_stage[:] = f(stage_arg, t_stage, *args)
+        residual = f_stage - k1
+
+        # Forward-difference Jacobian of f at the initial stage value, frozen for the step
+        for j in range(n):
+            eps = _FD_STEP * max(1.0, abs(stage_arg[j]))
+            perturbed = stage_arg.copy()
+            perturbed[j] += eps
+            jacobian[:, j] = (f(perturbed, t_stage, *args) - f_stage) / eps
+        newton_matrix = h * gamma * jacobian - identity
+
+        converged = False
+        for iteration in range(_DIRK_NEWTON_ITERATIONS):
+            delta = np.linalg.solve(newton_matrix, -residual)
+            k1 += delta
+            if np.max(np.abs(delta)) <= _DIRK_NEWTON_TOL * (1.0 + np.max(np.abs(k1))):
+                converged = True
+                break
+            # The last update is only checked, a new residual would go unused
+            if iteration < _DIRK_NEWTON_ITERATIONS - 1:
+                residual = f(x_prev + h * gamma * k1, t_stage, *args) - k1
+        if not converged:
+            raise RuntimeError("DIRK stage equation did not converge, reduce the step size")
+
+        x_prev = x_prev + h * k1
+        solution[:, i] = x_prev
+
+    return solution.T
+
+
+@njit
+def _dormand_prince_45_kernel(f, x0, t0, tf, h, tol, t_eval, args):
+    n = x0.shape[0]
+    stages = np.empty((7, n))
+
+    # Accepted steps, grown by doubling
+    capacity = 64
+    t_steps = np.empty(capacity)
+    x_steps = np.empty((capacity, n))
+    t_steps[0] = t0
+    x_steps[0] = x0
+    count = 1
+
+    dense = np.empty((t_eval.shape[0], n))
+    eval_idx = 0
+    while eval_idx < t_eval.shape[0] and t_eval[eval_idx] <= t0:
+        dense[eval_idx] = x0
+        eval_idx += 1
+
+    t = t0
+    x = x0.copy()
+    stages[0] = f(x, t, *args)
+    end_tol = 1e-12 * max(1.0, abs(tf))
+
+    while tf - t > end_tol:
+        h = min(h, tf - t)
+        if h < end_tol:
+            raise RuntimeError("Dormand-Prince step size underflow")
+
+        for s in range(1, 7):
+            stage_arg = x.copy()
+            for j in range(s):
+                stage_arg += h * _DP45_A[s, j] * stages[j]
+            stages[s] = f(stage_arg, t + _DP45_C[s] * h, *args)
+        # Row 6 of the tableau holds the 5th order weights, so stage 7 was taken at x_new
+        x_new = stage_arg
+
+        error = np.zeros(n)
+        for s in range(7):
+            error += h * _DP45_E[s] * stages[s]
+        err_norm = np.max(np.abs(error) / (1.0 + np.maximum(np.abs(x), np.abs(x_new)))) / tol
+
+        if err_norm <= 1.0:
+            t_new = t + h
+
+            # Dense output inside the step for the requested output times
+            while eval_idx < t_eval.shape[0] and t_eval[eval_idx] <= t_new + end_tol:
+                theta = (t_eval[eval_idx] - t) / h
+                value = x.copy()
+                for st in range(7):
+                    weight = h * theta * (_DP45_P[st, 0] + theta * (
+                            _DP45_P[st, 1] + theta * (_DP45_P[st, 2] + theta * _DP45_P[st, 3])))
+                    value += weight * stages[st]
+                dense[eval_idx] = value
+                eval_idx += 1
+
+            if count == capacity:
+                capacity *= 2
+                grown_t = np.empty(capacity)
+                grown_t[:count] = t_steps[:count]
+                t_steps = grown_t
+                grown_x = np.empty((capacity, n))
+                grown_x[:count] = x_steps[:count]
+                x_steps = grown_x
+            t_steps[count] = t_new
+            x_steps[count] = x_new
+            count += 1
+
+            t = t_new
+            x = x_new
+            stages[0] = stages[6]
+
+        # h_new = h * (tol / ||e||)^(1/5), limited to [0.2h, 5h]
+        if err_norm == 0.0:
+            factor = _DP45_MAX_FACTOR
+        else:
+            factor = min(_DP45_MAX_FACTOR, max(_DP45_MIN_FACTOR, _DP45_SAFETY * err_norm ** -0.2))
+        h *= factor
+
+    return t_steps[:count], x_steps[:count], dense
+
+
+def _with_rk4_startup(f, initial_states, t0, h, num_states, args):
+    """Extend the given start-up states with RK4 steps until there are num_states of them"""
+    initial_states = np.asarray(initial_states, dtype=np.float64)
+    given = initial_states.shape[0]
+    if given >= num_states:
+        return initial_states
+    extra = _run_kernel(_runge_kutta_4_kernel, f, initial_states[-1], float(t0 + (given - 1) * h),
+                        h, num_states - given + 1, args)
+    return np.concatenate((initial_states, extra[1:]))
+
+
+def _adams_bashforth_4_block(f, x, t, span, args):
+    """
+    AB4 over [t, t + span] with 4 and with 8 substeps, each run started afresh with 3 RK4 steps.
+    Returns the finer end state and its Richardson error estimate (order 4, so /15).
+    """
+    coarse = _run_kernel(_adams_bashforth_4_kernel, f,
+                         _with_rk4_startup(f, x[None, :], t, span / 4, 4, args), t, span / 4, 5, args)[-1]
+    fine = _run_kernel(_adams_bashforth_4_kernel, f,
+                       _with_rk4_startup(f, x[None, :], t, span / 8, 4, args), t, span / 8, 9, args)[-1]
+    return fine, np.max(np.abs(fine - coarse) / (1.0 + np.abs(fine))) / 15
 
 
 class CustomNumericalMethods:
     @staticmethod
-    def adams_bashforth_2(f, x0, t0, tf, h):
+    def rk4_bootstrap(f, x0, t0, h, num_states=4, args=()):
+        """
+        Classic RK4 start-up values for the multistep methods
+
+        Args:
+        f: Function that returns derivative (right-hand side of ODE), called as f(x, t, *args)
+        x0: Initial state vector
+        t0: Initial time
+        h: Step size
+        num_states: Number of states to return, x0 included
+        args: Extra arguments passed to f
+
+        Returns:
+        states: Array of the states at t0, t0 + h, ..., one per row
+        """
+        return _run_kernel(_runge_kutta_4_kernel, f,
+                           np.asarray(x0, dtype=np.float64), float(t0), h, num_states, args)
+
+    @staticmethod
+    def adams_bashforth_2(f, x0, t0, tf, h, args=(), initial_states=None):
         """
         2-step Adams-Bashforth method (2nd order)
 
         Args:
-        f: Function that returns derivative (right-hand side of ODE)
+        f: Function that returns derivative (right-hand side of ODE), called as f(x, t, *args)
         x0: Initial state vector
         t0: Initial time
         tf: Final time
         h: Step size
+        args: Extra arguments passed to f
+        initial_states: Optional states at t0, t0 + h, ... (starting with x0) replacing the start-up steps
 
         Returns:
         time_points: Array of time points
         solution: Array of solution values at each time point
         """
-        # Calculate number of steps
-        num_steps = int((tf - t0) / h) + 1
-        time_points = np.linspace(t0, tf, num_steps)
-
-        # Initialize solution array
-        solution = np.zeros((num_steps, len(x0)))
-        solution[0] = x0
+        num_steps, time_points = _time_grid(t0, tf, h)
 
-        # First step using Euler method to for the second k, after that it will take off on its own
-        if num_steps > 1:
-            k1 = f(x0, t0)
-            x1 = x0 + h * k1
-            solution[1] = x1
-
-            # we have already 
-            for i in range(2, num_steps):
-                t = time_points[i]
-                k1 = f(solution[i - 1], time_points[i - 1])
-                k0 = f(solution[i - 2], time_points[i - 2])
+        if initial_states is None:
+            initial_states = np.asarray(x0, dtype=np.float64)[None, :]
 
-                x_next = solution[i - 1] + h * (1.5 * k1 - 0.5 * k0)
-                solution[i] = x_next
+        solution = _run_kernel(_adams_bashforth_2_kernel, f, np.asarray(initial_states, dtype=np.float64),
+                               float(t0), h, num_steps, args)
 
         return time_points, solution
 
     @staticmethod
-    def adams_moulton_2(f, x0, t0, tf, h):
+    def adams_moulton_2(f, x0, t0, tf, h, args=(), initial_states=None):
         """
         2-step Adams-Moulton method (2nd order implicit method)
 
         Args:
-        f: Function that returns derivative (right-hand side of ODE)
+        f: Function that returns derivative (right-hand side of ODE), called as f(x, t, *args)
         x0: Initial state vector
         t0: Initial time
         tf: Final time
         h: Step size
+        args: Extra arguments passed to f
+        initial_states: Optional states at t0, t0 + h, ... (starting with x0) replacing the start-up steps
 
         Returns:
         time_points: Array of time points
         solution: Array of solution values at each time point
         """
-        num_steps = int((tf - t0) / h) + 1
-        time_points = np.linspace(t0, tf, num_steps)
-        solution = np.zeros((num_steps, len(x0)))
-        solution[0] = x0
-        if num_steps > 1:
-            k1 = f(x0, t0)
-            x1 = x0 + h * k1
-            solution[1] = x1
-
-            for i in range(2, num_steps):
-                t = time_points[i]
-
-                def implicit_equation(x_next):
-                    """
-                    Implicit equation to solve for next step
-                    Uses predictor-corrector approach
-                    """
-                    # Predictor (Adams-Bashforth)
-                    k1 = f(solution[i - 1], time_points[i - 1])
-                    k0 = f(solution[i - 2], time_points[i - 2])
-                    x_pred = solution[i - 1] + h * (1.5 * k1 - 0.5 * k0)
-
-                    k_next = f(x_next, t)
-                    k1 = f(solution[i - 1], time_points[i - 1])
-                    return x_next - (solution[i - 1] + h * (0.5 * k_next + 0.5 * k1))
-                solution[i] = optimize.fsolve(implicit_equation, solution[i - 1])
+        num_steps, time_points = _time_grid(t0, tf, h)
+
+        if initial_states is None:
+            initial_states = np.asarray(x0, dtype=np.float64)[None, :]
+
+        solution = _run_kernel(_adams_moulton_2_kernel, f, np.asarray(initial_states, dtype=np.float64),
+                               float(t0), h, num_steps, args)
 
         return time_points, solution
 
 
 #basically RK4 on steroids
     @staticmethod
-    def adams_bashforth_4(f, x0, t0, tf, h):
+    def adams_bashforth_4(f, x0, t0, tf, h, args=(), initial_states=None):
         """
         4-step Adams-Bashforth method (4th order)
 
         Args:
-        f: Function that returns derivative (right-hand side of ODE)
+        f: Function that returns derivative (right-hand side of ODE), called as f(x, t, *args)
         x0: Initial state vector
         t0: Initial time
         tf: Final time
         h: Step size
+        args: Extra arguments passed to f
+        initial_states: Optional states at t0, t0 + h, ... (starting with x0) replacing the start-up steps
 
         Returns:
         time_points: Array of time points
         solution: Array of solution values at each time point
         """
-        num_steps = int((tf - t0) / h) + 1
-        time_points = np.linspace(t0, tf, num_steps)
-
-        solution = np.zeros((num_steps, len(x0)))
-        solution[0] = x0
-
-        if num_steps > 1:
-            for i in range(1, min(4, num_steps)):
-                t = time_points[i - 1]
-                k1 = f(solution[i - 1], t)
-                k2 = f(solution[i - 1] + 0.5 * h * k1, t + 0.5 * h)
-                k3 = f(solution[i - 1] + 0.5 * h * k2, t + 0.5 * h)
-                k4 = f(solution[i - 1] + h * k3, t + h)
-
-                solution[i] = solution[i - 1] + h * (k1 + 2 * k2 + 2 * k3 + k4) / 6
-
-            for i in range(4, num_steps):
-                t = time_points[i]
-                k = [f(solution[i - j], time_points[i - j]) for j in range(1, 5)]
-                x_next = solution[i - 1] + h * (
-                        55 / 24 * k[0] -
-                        59 / 24 * k[1] +
-                        37 / 24 * k[2] -
-                        9 / 24 * k[3]
-                )
-                solution[i] = x_next
+        num_steps, time_points = _time_grid(t0, tf, h)
+
+        if initial_states is None:
+            initial_states = np.asarray(x0, dtype=np.float64)[None, :]
+        # AB4 needs four previous derivatives, missing start-up states come from RK4
+        initial_states = _with_rk4_startup(f, initial_states, t0, h, min(4, num_steps), args)
+
+        solution = _run_kernel(_adams_bashforth_4_kernel, f, initial_states,
+                               float(t0), h, num_steps, args)
 
         return time_points, solution
 
     @staticmethod
-    def custom_dirk_method(f, x0, t0, tf, h):
+    def custom_dirk_method(f, x0, t0, tf, h, args=()):
         """
         Diagonally Implicit Runge-Kutta (DIRK) method
 
+        Raises RuntimeError when a stage equation is not solved within the Newton iterations.
+
         Args:
-        f: Function that returns derivative (right-hand side of ODE)
+        f: Function that returns derivative (right-hand side of ODE), called as f(x, t, *args)
         x0: Initial state vector
         t0: Initial time
         tf: Final time
         h: Step size
+        args: Extra arguments passed to f
 
         Returns:
         time_points: Array of time points
         solution: Array of solution values at each time point
         """
-        num_steps = int((tf - t0) / h) + 1
-        time_points = np.linspace(t0, tf, num_steps)
-
-        solution = np.zeros((num_steps, len(x0)))
-        solution[0] = x0
+        num_steps, time_points = _time_grid(t0, tf, h)
 
-        for i in range(1, num_steps):
-            t_prev = time_points[i - 1]
-            t_curr = time_points[i]
+        solution = _run_kernel(_custom_dirk_kernel, f,
+                               np.asarray(x0, dtype=np.float64), float(t0), h, num_steps, args)
 
-            def implicit_equation(x_next):
-                """
-                Solve the implicit equation for the next step
-                Uses Radau IIA method coefficients
-                """
-                gamma = (3 - np.sqrt(3)) / 6
+        return time_points, solution
 
-                def stage_equation(k1):
-                    stage_arg = solution[i - 1] + h * gamma * k1
-                    return f(stage_arg, t_prev + h * gamma) - k1
+    @staticmethod
+    def dormand_prince_45(f, x0, t0, tf, h, args=(), tol=1e-6, t_eval=None):
+        """
+        Adaptive Dormand-Prince 5(4) embedded Runge-Kutta method
 
-                k1 = optimize.fsolve(stage_equation, f(solution[i - 1], t_prev))
+        Args:
+        f: Function that returns derivative (right-hand side of ODE), called as f(x, t, *args)
+        x0: Initial state vector
+        t0: Initial time
+        tf: Final time
+        h: Initial step size
+        args: Extra arguments passed to f
+        tol: Local error tolerance, mixed absolute/relative per component
+        t_eval: Optional sorted times within [t0, tf] to report the solution at, evaluated with
+                the method's 4th order dense output inside the accepted steps
 
-                return solution[i - 1] + h * k1 - x_next
+        Returns:
+        time_points: Accepted step times, or t_eval when given
+        solution: Array of solution values at each time point
+        """
+        t_eval_arr = np.empty(0) if t_eval is None else np.asarray(t_eval, dtype=np.float64)
+        if t_eval_arr.size and (np.any(np.diff(t_eval_arr) < 0) or
+                                t_eval_arr[0] < t0 or t_eval_arr[-1] > tf):
+            raise ValueError("t_eval must be sorted and lie within [t0, tf]")
 
-            solution[i] = optimize.fsolve(implicit_equation, solution[i - 1])
+        time_points, solution, dense = _run_kernel(_dormand_prince_45_kernel, f,
+                                                   np.asarray(x0, dtype=np.float64), float(t0),
+                                                   float(tf), float(h), float(tol), t_eval_arr, args)
 
+        if t_eval is not None:
+            return t_eval_arr, dense
         return time_points, solution
+
+    @staticmethod
+    def adams_bashforth_4_adaptive(f, x0, t0, tf, h, args=(), tol=1e-6,
+                                   candidates=_ASPA_CANDIDATES, processes=None):
+        """
+        Adaptive 4-step Adams-Bashforth with parallel step-size probing (ASPA)
+
+        From every accepted point, candidate blocks of length h, 2h, ..., N*h are integrated
+        with AB4 at two resolutions, the longest one within tol is accepted and the next h is
+        predicted from its error. Every block restarts from its initial point alone (3 RK4
+        start-up steps, then AB4), no Adams history carries over between accepted points, so
+        the method is effectively single-step with AB4 as the inner integrator.
+        With processes set the candidates run concurrently in a
+        multiprocessing pool of that size (f and args must then be picklable); the result does
+        not depend on it. The per-step dispatch only pays off for expensive right-hand sides,
+        so the default runs the candidates in turn.
+
+        Args:
+        f: Function that returns derivative (right-hand side of ODE), called as f(x, t, *args)
+        x0: Initial state vector
+        t0: Initial time
+        tf: Final time
+        h: Initial candidate step size
+        args: Extra arguments passed to f
+        tol: Local error tolerance, mixed absolute/relative per component
+        candidates: Number of candidate block lengths N probed per point
+        processes: Number of worker processes, None to probe serially
+
+        Returns:
+        time_points: Array of accepted time points
+        solution: Array of solution values at each time point
+        """
+        end_tol = 1e-12 * max(1.0, abs(tf))
+
+        t = float(t0)
+        x = np.asarray(x0, dtype=np.float64)
+        time_points = [t]
+        solution = [x]
+
+        pool = Pool(processes) if processes else None
+        try:
+            while tf - t > end_tol:
+                spans = [min(i * h, tf - t) for i in range(1, candidates + 1)]
+                tasks = [(f, x, t, span, args) for span in spans]
+                if pool is not None:
+                    blocks = pool.starmap(_adams_bashforth_4_block, tasks)
+                else:
+                    blocks = [_adams_bashforth_4_block(*task) for task in tasks]
+
+                accepted = [i for i, (_, err) in enumerate(blocks) if err <= tol]
+                if not accepted:
+                    # Even the shortest block failed, shrink and probe again from the same point
+                    h = spans[0] * max(_ASPA_MIN_FACTOR, _ASPA_SAFETY * (tol / blocks[0][1]) ** 0.2)
+                    if h < end_tol:
+                        raise RuntimeError("Adaptive Adams-Bashforth step size underflow")
+                    continue
+
+                best = accepted[-1]
+                x, err = blocks[best]
+                t += spans[best]
+                time_points.append(t)
+                solution.append(x)
+
+                # Predicted optimal block length, placed at the middle candidate for the next point
+                factor = _ASPA_MAX_FACTOR if err == 0 else min(
+                    _ASPA_MAX_FACTOR, max(_ASPA_MIN_FACTOR, _ASPA_SAFETY * (tol / err) ** 0.2))
+                h = spans[best] * factor / max(1, candidates // 2)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return np.array(time_points), np.array(solution)
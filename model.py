@@ -1,13 +1,165 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
+from scipy.integrate import solve_ivp
+
+from AP7.MultiStep import CustomNumericalMethods, njit
+
+# Order of the entries in the flat parameter array used by system_dynamics_nb
+PARAM_KEYS = (
+    'max_solar_capacity',
+    'max_wind_capacity',
+    'battery_capacity',
+    'grid_connection_limit',
+    'solar_efficiency',
+    'wind_efficiency',
+    'battery_charge_efficiency',
+    'battery_discharge_efficiency',
+    'temperature_sensitivity',
+    'wind_variability',
+)
+
+# Integrators compared by simulate_with_multiple_methods, keyed by their display name
+INTEGRATORS = {
+    'Adams-Bashforth 2': CustomNumericalMethods.adams_bashforth_2,
+    'Adams-Bashforth 4': CustomNumericalMethods.adams_bashforth_4,
+    'Adams-Moulton 2': CustomNumericalMethods.adams_moulton_2,
+    'DIRK': CustomNumericalMethods.custom_dirk_method,
+}
+
+# Methods that take the shared RK4 start-up values instead of bootstrapping themselves
+MULTISTEP_METHODS = ('Adams-Bashforth 2', 'Adams-Bashforth 4', 'Adams-Moulton 2')
+
+# Candidates for the reference solution in compute_method_statistics, in order of preference
+REFERENCE_METHODS = ('LSODA', 'Dormand-Prince 45', 'DIRK')
+
+# Angular frequency of the daily cycle (rad/hour)
+DAILY_OMEGA = 2 * math.pi / 24
+
+
+def pack_params(params):
+    """Flatten the params dict into a float64 array ordered as PARAM_KEYS"""
+    return np.array([params[key] for key in PARAM_KEYS], dtype=np.float64)
+
+
+def pack_environment(environmental_conditions):
+    """Flatten the environmental conditions into a float64 array [temperature, wind_speed]"""
+    return np.array([environmental_conditions.get('temperature', 20),
+                     environmental_conditions.get('wind_speed', 5)], dtype=np.float64)
+
+
+@njit(cache=True)
+def system_dynamics_nb(X, t, params_arr, env_arr):
+    """System dynamics on flat arrays so the integrator kernels can call it without the interpreter"""
+    return system_dynamics_into(np.empty(4), X, t, params_arr, env_arr)
+
+
+@njit(cache=True)
+def system_dynamics_into(derivatives, X, t, params_arr, env_arr):
+    """Same as system_dynamics_nb but writes into the preallocated derivatives array"""
+    solar_gen = X[0]
+    wind_gen = X[1]
+    battery_stored = X[2]
+
+    max_solar_capacity = params_arr[0]
+    max_wind_capacity = params_arr[1]
+    battery_capacity = params_arr[2]
+    grid_connection_limit = params_arr[3]
+    solar_efficiency = params_arr[4]
+    wind_efficiency = params_arr[5]
+    temperature_sensitivity = params_arr[8]
+    wind_variability = params_arr[9]
+
+    temp = env_arr[0]
+    wind_speed = env_arr[1]
+
+    # Every profile is built from one sine/cosine pair, the 12 hour term via sin(2a) = 2 sin(a) cos(a)
+    sin_day = math.sin(DAILY_OMEGA * t)
+    cos_day = math.cos(DAILY_OMEGA * t)
+
+    solar_input = (max_solar_capacity * solar_efficiency *
+                   (sin_day * 0.5 + 0.5) *
+                   (1 + temperature_sensitivity * temp))
+
+    wind_input = (max_wind_capacity * wind_efficiency *
+                  (cos_day * 0.5 + 0.5) *
+                  (1 + wind_variability * wind_speed))
+
+    total_demand = (
+            (50 + 20 * sin_day) +  # residential
+            (80 + 30 * cos_day) +  # industrial
+            (40 + 10 * 2 * sin_day * cos_day)  # commercial
+    )
+
+    derivatives[0] = solar_input * (1 - solar_gen / max_solar_capacity) - solar_gen
+    derivatives[1] = wind_input * (1 - wind_gen / max_wind_capacity) - wind_gen
+    # Charging factor as arithmetic on the comparison, no branch in the compiled RHS
+    derivatives[2] = (solar_gen + wind_gen - total_demand) * (0.9 * (battery_stored < battery_capacity))
+    derivatives[3] = min(max(total_demand - (solar_gen + wind_gen + battery_stored), 0.0),
+                         grid_connection_limit)
+    return derivatives
+
+
+def system_dynamics_py(X, t, params_arr, env_arr):
+    """Interpreted system_dynamics_nb, for one-shot runs too short to pay back the compilation"""
+    return system_dynamics_into.py_func(np.empty(4), X, t, params_arr, env_arr)
+
+
+@njit(cache=True)
+def system_dynamics_buffered(X, t, params_arr, env_arr, derivatives):
+    """
+    system_dynamics_into in the f(x, t, *args) form the integrator kernels call, with the
+    scratch array passed as the last argument. Each call overwrites the previous result.
+    """
+    return system_dynamics_into(derivatives, X, t, params_arr, env_arr)
+
+
+def system_dynamics_buffered_py(X, t, params_arr, env_arr, derivatives):
+    """Interpreted system_dynamics_buffered"""
+    return system_dynamics_into.py_func(derivatives, X, t, params_arr, env_arr)
+
+
+@lru_cache(maxsize=None)
+def lsoda_solver():
+    """
+    numbalsoda's lsoda and the address of the compiled right-hand side, or None without it.
+    Loaded on first use, importing numbalsoda alone compiles its drivers for several seconds.
+    """
+    try:
+        from numba import carray, cfunc
+        from numbalsoda import lsoda, lsoda_sig
+    except ImportError:  # numbalsoda is optional, the LSODA reference run is then skipped
+        return None
+
+    @cfunc(lsoda_sig, cache=True)
+    def system_dynamics_lsoda(t, u, du, p):
+        # p holds the packed params followed by [temperature, wind_speed]
+        data = carray(p, (len(PARAM_KEYS) + 2,))
+        system_dynamics_into(carray(du, (4,)), carray(u, (4,)), t,
+                             data[:len(PARAM_KEYS)], data[len(PARAM_KEYS):])
+
+    return lsoda, system_dynamics_lsoda.address
+
+
+def reference_method(results):
+    """Name of the most accurate solution available in results"""
+    for method in REFERENCE_METHODS:
+        if method in results:
+            return method
+    raise ValueError(f"results contain none of the reference methods {REFERENCE_METHODS}")
 
-from AP7.MultiStep import CustomNumericalMethods
 
 """Same code as in the AP6 just changing the call methods, instead of gaus_seldel and newtorn =, we call LMM methods"""
 class RenewableEnergySystemEnhanced:
+    __slots__ = ('_params', 'params_array', '_env', '_drhs')
+
     def __init__(self):
-        self.params = {
+        self._params = {
             'max_solar_capacity': 150,
             'max_wind_capacity': 120,
             'battery_capacity': 300,
@@ -20,85 +172,114 @@ class RenewableEnergySystemEnhanced:
             'wind_variability': 0.15,
         }
 
-        self.generation_models = {
-            'solar': lambda t, temp: (np.sin(2 * np.pi * t / 24) * 0.5 + 0.5) *
-                                     (1 + self.params['temperature_sensitivity'] * temp),
-            'wind': lambda t, wind_speed: (np.cos(2 * np.pi * t / 24) * 0.5 + 0.5) *
-                                          (1 + self.params['wind_variability'] * wind_speed)
-        }
-
-        self.demand_model = {
-            'residential': lambda t: 50 + 20 * np.sin(2 * np.pi * t / 24),
-            'industrial': lambda t: 80 + 30 * np.cos(2 * np.pi * t / 24),
-            'commercial': lambda t: 40 + 10 * np.sin(2 * np.pi * t / 12)
-        }
+        # Flat copy of params in PARAM_KEYS order for the RHS, kept in sync by update_params
+        self.params_array = pack_params(self._params)
 
-    def system_dynamics(self, X, t, environmental_conditions):
-        """System dynamics function - keeping original implementation"""
-        solar_gen, wind_gen, battery_stored, grid_draw = X
+        # Scratch arrays for system_dynamics: packed [temperature, wind_speed] and the returned
+        # derivatives, both overwritten on every call
+        self._env = np.empty(2)
+        self._drhs = np.empty(4)
 
-        temp = environmental_conditions.get('temperature', 20)
-        wind_speed = environmental_conditions.get('wind_speed', 5)
+    @property
+    def params(self):
+        """Read-only view of the system parameters, change them through update_params"""
+        return MappingProxyType(self._params)
 
-        solar_input = (self.params['max_solar_capacity'] *
-                       self.params['solar_efficiency'] *
-                       self.generation_models['solar'](t, temp))
-
-        wind_input = (self.params['max_wind_capacity'] *
-                      self.params['wind_efficiency'] *
-                      self.generation_models['wind'](t, wind_speed))
-
-        total_demand = (
-                self.demand_model['residential'](t) +
-                self.demand_model['industrial'](t) +
-                self.demand_model['commercial'](t)
-        )
+    def update_params(self, **changes):
+        """Change system parameters and repack params_array"""
+        unknown = set(changes) - set(self._params)
+        if unknown:
+            raise KeyError(f"Unknown parameters: {sorted(unknown)}")
+        self._params.update(changes)
+        self.params_array = pack_params(self._params)
 
-        derivatives = np.array([
-            solar_input * (1 - solar_gen / self.params['max_solar_capacity']) - solar_gen,
-            wind_input * (1 - wind_gen / self.params['max_wind_capacity']) - wind_gen,
-            (solar_gen + wind_gen - total_demand) * (
-                0.9 if battery_stored < self.params['battery_capacity'] else 0
-            ),
-            min(max(total_demand - (solar_gen + wind_gen + battery_stored), 0),
-                self.params['grid_connection_limit'])
-        ])
-        return derivatives
-
-    def simulate_with_multiple_methods(self, T=24, dt=0.1):
-        """Simulate using multiple numerical methods for comparison"""
-        X0 = [10, 10, 50, 0]  # Initial state
+    def system_dynamics(self, X, t, environmental_conditions):
+        """System dynamics function, the returned array is reused by the next call"""
+        self._env[0] = environmental_conditions.get('temperature', 20)
+        self._env[1] = environmental_conditions.get('wind_speed', 5)
+        return system_dynamics_into(self._drhs, np.asarray(X, dtype=np.float64), t,
+                                    self.params_array, self._env)
+
+    def simulate_with_multiple_methods(self, T=24, dt=0.1, parallel=False, jit=False):
+        """
+        Simulate using multiple numerical methods for comparison
+
+        With jit=True the integrators run as Numba kernels specialised on the jitted right-hand
+        side. Compiling them takes several seconds per process, so this only pays off for long
+        or repeated runs in one session; the default interprets the same kernels.
+
+        The methods are independent, so parallel=True runs each one in its own worker process.
+        Worth it only when a single run outweighs the process start-up (and, with jit=True, the
+        kernel compilation in every worker).
+        An adaptive 'Dormand-Prince 45' run interpolated to the same time grid serves as the
+        reference solution, or 'LSODA' takes that role with jit=True when numbalsoda is installed.
+        SciPy's 'Radau' is added as an implicit solver to compare the custom DIRK against.
+        """
+        X0 = np.array([10, 10, 50, 0], dtype=np.float64)  # Initial state
         env_conditions = {'temperature': 20, 'wind_speed': 5}
 
-        def system_wrapper(x, t):
-            return self.system_dynamics(x, t, env_conditions)
-
-        results = {}
-
-        time_points, solution = CustomNumericalMethods.adams_bashforth_2(
-            system_wrapper, X0, 0, T, dt
-        )
-        results['Adams-Bashforth 2'] = (time_points, solution)
-
-        time_points, solution = CustomNumericalMethods.adams_bashforth_4(
-            system_wrapper, X0, 0, T, dt
-        )
-        results['Adams-Bashforth 4'] = (time_points, solution)
+        # The right-hand side takes its parameters as flat arrays
+        args = (self.params_array, pack_environment(env_conditions))
+        rhs = system_dynamics_nb if jit else system_dynamics_py
+        # The custom integrators copy every slope they keep, so their RHS calls can share one
+        # derivatives buffer instead of allocating a fresh array each time
+        buffered_rhs = system_dynamics_buffered if jit else system_dynamics_buffered_py
+        buffered_args = args + (np.empty(4),)
+
+        # One RK4 start-up for all multistep methods, so they differ only in their stepping formula
+        bootstrap = CustomNumericalMethods.rk4_bootstrap(buffered_rhs, X0, 0, dt, 4, buffered_args)
+        method_kwargs = {
+            method: {'initial_states': bootstrap} if method in MULTISTEP_METHODS else {}
+            for method in INTEGRATORS
+        }
 
-        time_points, solution = CustomNumericalMethods.adams_moulton_2(
-            system_wrapper, X0, 0, T, dt
+        if parallel:
+            with ProcessPoolExecutor(max_workers=len(INTEGRATORS)) as executor:
+                futures = {
+                    method: executor.submit(integrator, buffered_rhs, X0, 0, T, dt, buffered_args,
+                                            **method_kwargs[method])
+                    for method, integrator in INTEGRATORS.items()
+                }
+                results = {method: future.result() for method, future in futures.items()}
+        else:
+            results = {}
+            for method, integrator in INTEGRATORS.items():
+                results[method] = integrator(buffered_rhs, X0, 0, T, dt, buffered_args,
+                                             **method_kwargs[method])
+
+        # All runs share the fixed-step grid, which ends at the last multiple of dt within T
+        # (give or take a rounding error)
+        time_points = results['DIRK'][0]
+        results['Dormand-Prince 45'] = CustomNumericalMethods.dormand_prince_45(
+            buffered_rhs, X0, 0, time_points[-1], dt, buffered_args, tol=1e-8, t_eval=time_points
         )
-        results['Adams-Moulton 2'] = (time_points, solution)
 
-        time_points, solution = CustomNumericalMethods.custom_dirk_method(
-            system_wrapper, X0, 0, T, dt
-        )
-        results['DIRK'] = (time_points, solution)
+        # Stiff reference point from SciPy, its stage solves run in compiled code. Radau keeps
+        # the arrays it gets back, so it uses the allocating RHS
+        radau = solve_ivp(lambda t, x: rhs(x, t, *args), (0, time_points[-1]), X0,
+                          method='Radau', t_eval=time_points, rtol=1e-6)
+        if radau.success:
+            results['Radau'] = (time_points, radau.y.T)
+
+        solver = lsoda_solver() if jit else None
+        if solver is not None:
+            lsoda, rhs_address = solver
+            # LSODA outranks the tol=1e-8 Dormand-Prince run as reference, so it needs the
+            # tighter tolerance: at 1e-8 its grid error is about 100x worse than Dormand-Prince's
+            solution, success = lsoda(rhs_address, X0, time_points,
+                                      data=np.concatenate(args), rtol=1e-11, atol=1e-11)
+            if success:
+                results['LSODA'] = (time_points, solution)
 
         return results
 
-    def visualize_method_comparison(self, results):
-        """Create comprehensive visualization comparing different numerical methods"""
+    def visualize_method_comparison(self, results, stride=1):
+        """
+        Create comprehensive visualization comparing different numerical methods
+
+        Only every stride-th point is drawn, smooth curves on a fine grid look the same with far
+        fewer segments to rasterize.
+        """
         fig = plt.figure(figsize=(15, 12))
         gs = GridSpec(4, 1, figure=fig)
 
@@ -107,12 +288,18 @@ class RenewableEnergySystemEnhanced:
         colors = {'Adams-Bashforth 2': '#2ecc71',
                   'Adams-Bashforth 4': '#3498db',
                   'Adams-Moulton 2': '#e74c3c',
-                  'DIRK': '#9b59b6'}
+                  'DIRK': '#9b59b6',
+                  'Dormand-Prince 45': '#f39c12',
+                  'Radau': '#1abc9c',
+                  'LSODA': '#34495e'}
 
         line_styles = {'Adams-Bashforth 2': '--',
                        'Adams-Bashforth 4': ':',
                        'Adams-Moulton 2': '-.',
-                       'DIRK': '-'}
+                       'DIRK': '-',
+                       'Dormand-Prince 45': '-',
+                       'Radau': '--',
+                       'LSODA': '-'}
 
         for idx, var in enumerate(variables):
             ax = fig.add_subplot(gs[idx])
@@ -128,7 +315,7 @@ class RenewableEnergySystemEnhanced:
                 elif method == 'Adams-Moulton 2':
                     offset = 0.1
 
-                ax.plot(t, sol[:, idx] + offset,
+                ax.plot(t[::stride], sol[::stride, idx] + offset,
                         label=method,
                         color=colors[method],
                         linestyle=line_styles[method],
@@ -146,22 +333,27 @@ class RenewableEnergySystemEnhanced:
 
     def compute_method_statistics(self, results):
         """Compute statistical comparisons between methods"""
+        reference = reference_method(results)
+        ref_time, ref_sol = results[reference]
+        methods = [method for method in results if method != reference]
+
+        # Error metrics for all methods at once, stacked along the first axis
+        abs_error = np.abs(np.stack([results[method][1] for method in methods]) - ref_sol)
+        rel_error = abs_error / (np.abs(ref_sol) + 1e-10)  # Avoid division by zero
+
+        max_abs_error = abs_error.max(axis=(1, 2))
+        mean_abs_error = abs_error.mean(axis=(1, 2))
+        max_rel_error = rel_error.max(axis=(1, 2))
+        mean_rel_error = rel_error.mean(axis=(1, 2))
+
         stats = {}
-        reference_method = 'DIRK'  # Using DIRK as reference
-        ref_time, ref_sol = results[reference_method]
-
-        for method, (t, sol) in results.items():
-            if method != reference_method:
-                # Compute various error metrics
-                abs_error = np.abs(sol - ref_sol)
-                rel_error = abs_error / (np.abs(ref_sol) + 1e-10)  # Avoid division by zero
-
-                stats[method] = {
-                    'max_abs_error': np.max(abs_error),
-                    'mean_abs_error': np.mean(abs_error),
-                    'max_rel_error': np.max(rel_error),
-                    'mean_rel_error': np.mean(rel_error)
-                }
+        for i, method in enumerate(methods):
+            stats[method] = {
+                'max_abs_error': max_abs_error[i],
+                'mean_abs_error': mean_abs_error[i],
+                'max_rel_error': max_rel_error[i],
+                'mean_rel_error': mean_rel_error[i]
+            }
 
         return stats
 
@@ -174,13 +366,14 @@ def run_simulation_analysis():
     results = system.simulate_with_multiple_methods(T=24, dt=0.1)
 
     print("\nGenerating comparison visualizations...")
-    system.visualize_method_comparison(results)
+    fig = system.visualize_method_comparison(results, stride=5)
     plt.show()
+    plt.close(fig)
 
     print("\nComputing method statistics...")
     stats = system.compute_method_statistics(results)
 
-    print("\nMethod Comparison Statistics (relative to DIRK method):")
+    print(f"\nMethod Comparison Statistics (relative to {reference_method(results)} method):")
     for method, metrics in stats.items():
         print(f"\n{method}:")
         for metric, value in metrics.items():